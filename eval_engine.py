@@ -4,6 +4,7 @@ Uses Azure OpenAI GPT-4o as judge model.
 """
 
 import asyncio
+import contextlib
 import os
 import random
 from typing import Any
@@ -235,6 +236,45 @@ def _evaluate_topic_routing(
     }
 
 
+async def _run_ai_metric(
+    name: str,
+    metric,
+    threshold: float,
+    turns: list[dict],
+    conversation: list[dict],
+    expected_output: str,
+    context: str,
+    judge_limit: asyncio.Semaphore | None = None,
+) -> dict:
+    """Measure one DeepEval metric, returning an error result instead of raising."""
+    try:
+        if name in CONVERSATIONAL_METRICS:
+            test_case = _build_conversational_test_case(
+                turns, conversation, expected_output, context
+            )
+        else:
+            test_case = _build_llm_test_case(turns, conversation, expected_output, context)
+
+        await asyncio.sleep(random.uniform(0, 1.5))
+        async with judge_limit or contextlib.nullcontext():
+            await _measure_with_retry(metric, test_case)
+
+        logger.debug(f"Metric {name}: {metric.score:.3f}")
+        return {
+            "score": metric.score,
+            "reason": getattr(metric, "reason", ""),
+            "passed": metric.score >= threshold,
+        }
+
+    except Exception as e:
+        logger.error(f"Metric {name} failed: {e}")
+        return {
+            "score": 0.0,
+            "reason": f"Error: {e}",
+            "passed": False,
+        }
+
+
 async def evaluate_case(
     turns: list[dict],
     conversation: list[dict],
@@ -246,16 +286,21 @@ async def evaluate_case(
     expected_topic: str = "",
     keywords_any: list[str] | None = None,
     keywords_all: list[str] | None = None,
+    judge_limit: asyncio.Semaphore | None = None,
 ) -> dict[str, dict]:
     """Run selected metrics on a test case.
 
     Tier 1 (deterministic, no LLM cost) run first: exact_match, keyword_match_any,
-    keyword_match_all, topic_routing. Tier 2 (DeepEval AI metrics) run after.
+    keyword_match_all, topic_routing. Tier 2 (DeepEval AI metrics) run after, concurrently.
+    Pass a judge_limit semaphore shared across cases to cap judge calls in flight;
+    without one, every AI metric of the case calls the judge at once.
 
     Returns:
         Dict mapping metric_name -> {"score": float, "reason": str, "passed": bool}
     """
     results: dict[str, dict] = {}
+    ai_metrics: list[str] = []
+    ai_runs: list = []
     model = None
 
     actual_output = ""
@@ -298,32 +343,23 @@ async def evaluate_case(
 
         if model is None:
             model = _get_judge_model()
-        metric = METRIC_REGISTRY[name](model, threshold)
-
-        try:
-            if name in CONVERSATIONAL_METRICS:
-                test_case = _build_conversational_test_case(
-                    turns, conversation, expected_output, context
-                )
-            else:
-                test_case = _build_llm_test_case(turns, conversation, expected_output, context)
-
-            await asyncio.sleep(random.uniform(0, 1.5))
-            await _measure_with_retry(metric, test_case)
-
-            results[name] = {
-                "score": metric.score,
-                "reason": getattr(metric, "reason", ""),
-                "passed": metric.score >= threshold,
-            }
-            logger.debug(f"Metric {name}: {metric.score:.3f}")
+        ai_metrics.append(name)
+        ai_runs.append(
+            _run_ai_metric(
+                name,
+                METRIC_REGISTRY[name](model, threshold),
+                threshold,
+                turns,
+                conversation,
+                expected_output,
+                context,
+                judge_limit,
+            )
+        )
 
-        except Exception as e:
-            logger.error(f"Metric {name} failed: {e}")
-            results[name] = {
-                "score": 0.0,
-                "reason": f"Error: {e}",
-                "passed": False,
-            }
+    # Tier 2 judge calls are independent, so overlap them instead of awaiting each in turn
+    for name, result in zip(ai_metrics, await asyncio.gather(*ai_runs)):
+        results[name] = result
 
-    return results
+    # Keep the caller's metric order for display
+    return {name: results[name] for name in metric_names if name in results}
@@ -57,17 +57,44 @@ def parse_copilot_url(url: str) -> ParsedAgentUrl:
     return ParsedAgentUrl(environment_id=m.group("env"), bot_id=m.group("bot"))
 
 
+def _new_msal_app() -> msal.PublicClientApplication:
+    return msal.PublicClientApplication(
+        client_id=_CLI_CLIENT_ID,
+        authority="https://login.microsoftonline.com/common",
+    )
+
+
+# MSAL apps hold the in-memory token cache, so each browser session gets its own
+# app: a retried setup can reuse that session's sign-in without ever seeing (or
+# clearing) another session's account. The cache is deliberately never written
+# to disk: it holds an Azure CLI refresh token.
+_MSAL_APPS: dict[str, msal.PublicClientApplication] = {}
+
+
+def get_msal_app(session_key: str) -> msal.PublicClientApplication:
+    """Return the public client for one browser session, creating it on first use."""
+    app = _MSAL_APPS.get(session_key)
+    if app is None:
+        app = _MSAL_APPS[session_key] = _new_msal_app()
+    return app
+
+
+def forget_msal_app(session_key: str) -> None:
+    """Drop a session's public client, and with it every account it signed in."""
+    _MSAL_APPS.pop(session_key, None)
+
+
 def initiate_device_flow(
     scopes: list[str] | None = None,
+    app: msal.PublicClientApplication | None = None,
 ) -> tuple[msal.PublicClientApplication, dict]:
     """Start device code flow. Returns (msal_app, flow_dict).
 
+    Uses a fresh public client unless ``app`` is given.
     flow_dict contains 'user_code' and 'verification_uri' for display.
     """
-    app = msal.PublicClientApplication(
-        client_id=_CLI_CLIENT_ID,
-        authority="https://login.microsoftonline.com/common",
-    )
+    if app is None:
+        app = _new_msal_app()
     flow = app.initiate_device_flow(scopes=scopes or _GRAPH_SCOPES)
     if "user_code" not in flow:
         raise RuntimeError(f"Failed to initiate device flow: {flow.get('error_description')}")
@@ -93,6 +120,23 @@ def complete_device_flow(
     return token, tenant_id
 
 
+def acquire_graph_token_silent(
+    app: msal.PublicClientApplication,
+) -> tuple[str, str] | None:
+    """Return (access_token, tenant_id) from the token cache, or None if a login is needed."""
+    accounts = app.get_accounts()
+    if not accounts:
+        return None
+    result = app.acquire_token_silent(_GRAPH_SCOPES, account=accounts[0])
+    if not result or "access_token" not in result:
+        return None
+    tenant_id = result.get("id_token_claims", {}).get("tid") or accounts[0].get("realm", "")
+    if not tenant_id:
+        return None
+    logger.info("Reusing cached Graph token for tenant {}", tenant_id)
+    return result["access_token"], tenant_id
+
+
 def _graph_get(headers: dict, path: str, params: dict | None = None) -> httpx.Response:
     return httpx.get(f"{_GRAPH_BASE}{path}", headers=headers, params=params, timeout=30)
 
@@ -437,25 +481,26 @@ def lookup_agent_schema_name(
     environment_id: str,
     bot_id: str,
     bap_token: str | None = None,
+    org_url: str | None = None,
 ) -> str:
     """Look up the agent's Dataverse schema name from its bot GUID.
 
     Flow: BAP API → get Dataverse org URL → Dataverse API → bot schema name.
+    Pass org_url when it is already known to skip the BAP step entirely.
     """
     accounts = msal_app.get_accounts()
     if not accounts:
         raise RuntimeError("No cached account for schema name lookup")
 
-    # Get BAP token if not provided
-    if not bap_token:
-        result = msal_app.acquire_token_silent(_BAP_SCOPES, account=accounts[0])
-        if not result or "access_token" not in result:
-            raise RuntimeError("Cannot acquire BAP token silently for schema lookup")
-        bap_token = result["access_token"]
-
     # Step 1: Get environment details to find the Dataverse org URL
-    org_url = _get_org_url_from_env(bap_token, environment_id)
-    logger.info("Dataverse org URL: {}", org_url)
+    if not org_url:
+        if not bap_token:
+            result = msal_app.acquire_token_silent(_BAP_SCOPES, account=accounts[0])
+            if not result or "access_token" not in result:
+                raise RuntimeError("Cannot acquire BAP token silently for schema lookup")
+            bap_token = result["access_token"]
+        org_url = _get_org_url_from_env(bap_token, environment_id)
+        logger.info("Dataverse org URL: {}", org_url)
 
     # Step 2: Get a Dataverse token for this org
     dv_scopes = [f"{org_url}/.default"]
@@ -1,5 +1,8 @@
 """Unit tests for eval engine with mocked DeepEval metrics."""
 
+import asyncio
+import threading
+import time
 from unittest.mock import MagicMock, patch
 
 import pytest
@@ -149,6 +152,57 @@ async def test_evaluate_case_unknown_metric(mock_env):
     assert "nonexistent_metric" not in result
 
 
+@pytest.mark.asyncio
+async def test_evaluate_case_ai_metrics_overlap_and_keep_order(mock_env):
+    """AI metrics are measured concurrently; results keep the requested metric order."""
+    in_flight = 0
+    max_in_flight = 0
+
+    async def fake_measure(metric, test_case):
+        nonlocal in_flight, max_in_flight
+        in_flight += 1
+        max_in_flight = max(max_in_flight, in_flight)
+        await asyncio.sleep(0)
+        in_flight -= 1
+
+    def _metric(score):
+        m = MagicMock()
+        m.score = score
+        m.reason = ""
+        return m
+
+    with (
+        patch("eval_engine._get_judge_model", return_value=_mock_judge()),
+        patch(
+            "eval_engine.METRIC_REGISTRY",
+            {
+                "answer_relevancy": lambda model, threshold: _metric(0.9),
+                "task_completion": lambda model, threshold: _metric(0.2),
+            },
+        ),
+        patch("eval_engine.random.uniform", return_value=0),
+        patch("eval_engine._measure_with_retry", side_effect=fake_measure),
+    ):
+        from eval_engine import evaluate_case
+
+        result = await evaluate_case(
+            turns=[{"role": "user", "content": "Test"}],
+            conversation=[
+                {"role": "user", "content": "Test"},
+                {"role": "assistant", "content": "Response"},
+            ],
+            expected_output="Response",
+            context="",
+            metric_names=["task_completion", "exact_match", "answer_relevancy"],
+            threshold=0.5,
+        )
+
+    assert max_in_flight == 2
+    assert list(result) == ["task_completion", "exact_match", "answer_relevancy"]
+    assert result["task_completion"]["score"] == 0.2
+    assert result["answer_relevancy"]["passed"] is True
+
+
 # --- Topic routing tests ---
 
 
@@ -348,6 +402,55 @@ async def test_evaluate_case_jitter_applied(mock_env):
     mock_sleep.assert_called_once_with(0.5)
 
 
+@pytest.mark.asyncio
+async def test_evaluate_case_judge_limit_caps_concurrent_calls(mock_env):
+    """A shared judge_limit bounds how many metric.measure calls run at once."""
+    lock = threading.Lock()
+    active = peak = 0
+
+    def measure(_test_case):
+        nonlocal active, peak
+        with lock:
+            active += 1
+            peak = max(peak, active)
+        time.sleep(0.02)
+        with lock:
+            active -= 1
+
+    def make_metric(model, threshold):
+        metric = MagicMock()
+        metric.score = 0.8
+        metric.reason = "Good"
+        metric.measure.side_effect = measure
+        return metric
+
+    with (
+        patch("eval_engine._get_judge_model", return_value=_mock_judge()),
+        patch(
+            "eval_engine.METRIC_REGISTRY",
+            {"answer_relevancy": make_metric, "task_completion": make_metric},
+        ),
+        patch("eval_engine.random.uniform", return_value=0),
+    ):
+        from eval_engine import evaluate_case
+
+        judge_limit = asyncio.Semaphore(1)
+        result = await evaluate_case(
+            turns=[{"role": "user", "content": "Test"}],
+            conversation=[
+                {"role": "user", "content": "Test"},
+                {"role": "assistant", "content": "Response"},
+            ],
+            expected_output="",
+            context="",
+            metric_names=["answer_relevancy", "task_completion"],
+            judge_limit=judge_limit,
+        )
+
+    assert set(result) == {"answer_relevancy", "task_completion"}
+    assert peak == 1
+
+
 # --- Tier 1 metric tests ---
 
 
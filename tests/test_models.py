@@ -30,6 +30,7 @@ def test_eval_run_defaults():
     assert r.avg_score == 0.0
     assert r.total_cases == 0
     assert r.completed_cases == 0
+    assert r.progress_pct == 0
 
 
 def test_eval_result_defaults():
@@ -37,3 +38,23 @@ def test_eval_result_defaults():
     assert r.passed is False
     assert r.duration_seconds == 0.0
     assert r.scores_json == "{}"
+    assert r.avg_score is None
+
+
+def test_advance_progress_updates_count_and_pct():
+    from sqlmodel import Session, SQLModel, create_engine
+
+    from web.models import advance_progress
+
+    engine = create_engine("sqlite://")
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        session.add(EvalRun(name="run-1", dataset_id=1, total_cases=3))
+        session.add(EvalRun(name="run-2", dataset_id=1))
+        session.commit()
+        session.execute(advance_progress(1, 2))
+        session.execute(advance_progress(2))
+        session.commit()
+        run_1, run_2 = session.get(EvalRun, 1), session.get(EvalRun, 2)
+        assert (run_1.completed_cases, run_1.progress_pct) == (2, 66)
+        assert (run_2.completed_cases, run_2.progress_pct) == (1, 0)
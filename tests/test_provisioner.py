@@ -7,7 +7,12 @@ import pytest
 from provisioner import (
     ParsedAgentUrl,
     ProvisioningResult,
+    acquire_graph_token_silent,
     create_app_registration,
+    forget_msal_app,
+    get_msal_app,
+    initiate_device_flow,
+    lookup_agent_schema_name,
     parse_copilot_url,
     register_power_platform_admin_app,
     update_env_file,
@@ -320,3 +325,93 @@ def test_register_power_platform_admin_app_failure(mock_put):
 
     with pytest.raises(RuntimeError, match="Failed to register Power Platform admin app"):
         register_power_platform_admin_app(mock_msal_app, "test-client-id")
+
+
+# --- lookup_agent_schema_name ---
+
+
+@patch("provisioner._get_org_url_from_env")
+@patch("provisioner.httpx.get")
+def test_lookup_agent_schema_name_with_known_org_url_skips_bap(mock_get, mock_org_url):
+    mock_msal_app = MagicMock()
+    mock_msal_app.get_accounts.return_value = [{"username": "admin@test.com"}]
+    mock_msal_app.acquire_token_silent.return_value = {"access_token": "dv-token"}
+
+    get_resp = MagicMock()
+    get_resp.status_code = 200
+    get_resp.json.return_value = {"schemaname": "cr123_agent", "name": "Agent"}
+    mock_get.return_value = get_resp
+
+    schema = lookup_agent_schema_name(
+        mock_msal_app, "env-id", "bot-id", org_url="https://org.crm.dynamics.com"
+    )
+
+    assert schema == "cr123_agent"
+    mock_org_url.assert_not_called()
+    mock_msal_app.acquire_token_silent.assert_called_once_with(
+        ["https://org.crm.dynamics.com/.default"], account={"username": "admin@test.com"}
+    )
+    assert mock_get.call_args[0][0] == "https://org.crm.dynamics.com/api/data/v9.2/bots(bot-id)"
+
+
+# --- acquire_graph_token_silent ---
+
+
+def test_acquire_graph_token_silent_uses_cached_account():
+    mock_msal_app = MagicMock()
+    mock_msal_app.get_accounts.return_value = [{"username": "admin@test.com"}]
+    mock_msal_app.acquire_token_silent.return_value = {
+        "access_token": "graph-token",
+        "id_token_claims": {"tid": "tenant-123"},
+    }
+    assert acquire_graph_token_silent(mock_msal_app) == ("graph-token", "tenant-123")
+
+
+def test_acquire_graph_token_silent_none_without_account():
+    mock_msal_app = MagicMock()
+    mock_msal_app.get_accounts.return_value = []
+    assert acquire_graph_token_silent(mock_msal_app) is None
+    mock_msal_app.acquire_token_silent.assert_not_called()
+
+
+def test_acquire_graph_token_silent_none_when_cache_misses():
+    mock_msal_app = MagicMock()
+    mock_msal_app.get_accounts.return_value = [{"username": "admin@test.com"}]
+    mock_msal_app.acquire_token_silent.return_value = None
+    assert acquire_graph_token_silent(mock_msal_app) is None
+
+
+# --- get_msal_app ---
+
+
+def test_get_msal_app_is_per_session_and_keeps_cache_in_memory(monkeypatch):
+    monkeypatch.setattr("provisioner._MSAL_APPS", {})
+    with patch(
+        "provisioner.msal.PublicClientApplication", side_effect=lambda **kw: MagicMock()
+    ) as mock_cls:
+        app = get_msal_app("session-a")
+        assert get_msal_app("session-a") is app
+        assert get_msal_app("session-b") is not app
+        assert mock_cls.call_count == 2
+        assert "token_cache" not in mock_cls.call_args.kwargs
+
+
+def test_forget_msal_app_only_drops_that_session(monkeypatch):
+    monkeypatch.setattr("provisioner._MSAL_APPS", {})
+    with patch("provisioner.msal.PublicClientApplication", side_effect=lambda **kw: MagicMock()):
+        app_a = get_msal_app("session-a")
+        app_b = get_msal_app("session-b")
+        forget_msal_app("session-a")
+        forget_msal_app("never-signed-in")
+        assert get_msal_app("session-a") is not app_a
+        assert get_msal_app("session-b") is app_b
+
+
+def test_initiate_device_flow_uses_given_app():
+    mock_msal_app = MagicMock()
+    mock_msal_app.initiate_device_flow.return_value = {"user_code": "ABC", "verification_uri": "u"}
+    with patch("provisioner.msal.PublicClientApplication") as mock_cls:
+        app, flow = initiate_device_flow(app=mock_msal_app)
+    assert app is mock_msal_app
+    assert flow["user_code"] == "ABC"
+    mock_cls.assert_not_called()
@@ -0,0 +1,203 @@
+"""Tests for eval run execution helpers."""
+
+import asyncio
+import json
+from unittest.mock import patch
+
+import pytest
+from sqlalchemy.pool import StaticPool
+from sqlmodel import Session, SQLModel, create_engine, select
+
+from web.models import Dataset, EvalResult, EvalRun
+from web.pages.runs import RunState, _iter_json_array
+
+
+def test_iter_json_array_matches_json_loads():
+    cases = [
+        {"turns": [{"role": "user", "content": "hi, there"}], "expected_output": "[ok]"},
+        {"turns": [], "keywords_any": ["a", "b"]},
+    ]
+    for text in (json.dumps(cases), json.dumps(cases, indent=2)):
+        assert list(_iter_json_array(text)) == cases
+
+
+def test_iter_json_array_empty():
+    assert list(_iter_json_array("[]")) == []
+    assert list(_iter_json_array("  [ \n ]  ")) == []
+
+
+def test_iter_json_array_is_lazy():
+    items = _iter_json_array('[{"a": 1}, not json]')
+    assert next(items) == {"a": 1}
+    with pytest.raises(ValueError):
+        next(items)
+
+
+def test_iter_json_array_rejects_non_array():
+    with pytest.raises(ValueError):
+        list(_iter_json_array('{"a": 1}'))
+
+
+def test_update_run_progress_touches_only_matching_row():
+    state = RunState()
+    state.runs = [
+        {"id": 1, "name": "a", "progress": "0/4", "progress_pct": 0},
+        {"id": 2, "name": "b", "progress": "0/2", "progress_pct": 0},
+    ]
+    state.update_run_progress(2, 1, 2)
+    assert state.runs[0] == {"id": 1, "name": "a", "progress": "0/4", "progress_pct": 0}
+    assert state.runs[1] == {"id": 2, "name": "b", "progress": "1/2", "progress_pct": 50}
+
+
+def test_set_metric_adds_and_removes_once():
+    state = RunState()
+    state.set_metric(True, "bias")
+    state.set_metric(True, "bias")
+    state.set_metric(False, "answer_relevancy")
+    state.set_metric(False, "toxicity")
+    assert state.selected_metrics == {"bias"}
+
+
+# --- execute_run ---
+
+
+class _FakeRunState:
+    """Stands in for RunState inside execute_run: a no-op lock plus progress capture."""
+
+    def __init__(self):
+        self.progress: list[tuple[int, int]] = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def update_run_progress(self, run_id: int, completed: int, total: int) -> None:
+        self.progress.append((completed, total))
+
+    def load_runs(self) -> None:
+        pass
+
+
+@pytest.fixture
+def run_db():
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    SQLModel.metadata.create_all(engine)
+    with patch("web.pages.runs.rx.session", lambda: Session(engine)):
+        yield engine
+
+
+def _add_run(engine, data_json: str, total_cases: int, max_concurrent: int = 2) -> int:
+    with Session(engine) as session:
+        dataset = Dataset(name="d", num_cases=total_cases, data_json=data_json)
+        session.add(dataset)
+        session.flush()
+        run = EvalRun(
+            name="r",
+            dataset_id=dataset.id,
+            total_cases=total_cases,
+            metrics_json='["exact_match"]',
+            config_json=json.dumps(
+                {"threshold": 0.5, "delay_seconds": 0, "max_concurrent": max_concurrent}
+            ),
+        )
+        session.add(run)
+        session.commit()
+        return run.id
+
+
+async def _fake_conversation(turns):
+    if turns[0]["content"] == "boom":
+        raise RuntimeError("conversation failed")
+    return [*turns, {"role": "assistant", "content": "answer"}], []
+
+
+async def _fake_evaluate(*, turns, **kwargs):
+    return {"exact_match": {"score": 1.0 if turns[0]["content"] == "good" else 0.0}}
+
+
+async def _execute(run_id: int) -> _FakeRunState:
+    fake = _FakeRunState()
+    with (
+        patch("d2e_client.run_conversation", _fake_conversation),
+        patch("eval_engine.evaluate_case", _fake_evaluate),
+    ):
+        # A hang here is a regression in the worker/flusher shutdown
+        await asyncio.wait_for(RunState.execute_run.fn(fake, run_id), timeout=10)
+    return fake
+
+
+def _case(content: str) -> dict:
+    return {"turns": [{"role": "user", "content": content}], "expected_output": "x"}
+
+
+async def test_execute_run_saves_every_case_and_completes(run_db):
+    cases = [_case("good"), _case("boom"), "not a case", _case("bad"), _case("good")]
+    run_id = _add_run(run_db, json.dumps(cases), len(cases))
+
+    with patch("web.pages.runs._RESULT_BATCH_SIZE", 2):
+        fake = await _execute(run_id)
+
+    with Session(run_db) as session:
+        run = session.get(EvalRun, run_id)
+        rows = session.exec(select(EvalResult).order_by(EvalResult.test_case_index)).all()
+
+    assert [r.test_case_index for r in rows] == [0, 1, 2, 3, 4]
+    assert [r.passed for r in rows] == [True, False, False, False, True]
+    assert rows[1].actual_output == "Error: conversation failed"
+    assert rows[1].avg_score is None
+    assert rows[2].actual_output.startswith("Error:")
+    assert rows[2].input_json == "[]"
+    assert run.status == "completed"
+    assert run.error == ""
+    assert run.completed_cases == 5
+    assert run.progress_pct == 100
+    # AVG skips the errored cases' NULL scores: (1 + 0 + 1) / 3
+    assert run.avg_score == pytest.approx(2 / 3)
+    assert run.completed_at is not None
+    assert fake.progress[-1] == (5, 5)
+
+
+async def test_execute_run_bad_cases_do_not_hang(run_db):
+    cases = ["a", 1, None, ["x"]]
+    run_id = _add_run(run_db, json.dumps(cases), len(cases), max_concurrent=3)
+
+    await _execute(run_id)
+
+    with Session(run_db) as session:
+        run = session.get(EvalRun, run_id)
+    assert run.status == "completed"
+    assert run.completed_cases == 4
+
+
+async def test_execute_run_marks_run_failed_when_a_batch_is_lost(run_db):
+    run_id = _add_run(run_db, json.dumps([_case("good"), _case("bad")]), 2)
+
+    with patch("web.pages.runs.advance_progress", side_effect=RuntimeError("database is locked")):
+        await _execute(run_id)
+
+    with Session(run_db) as session:
+        run = session.get(EvalRun, run_id)
+        saved = session.exec(select(EvalResult)).all()
+    assert saved == []
+    assert run.status == "failed"
+    assert run.error == "2 results could not be saved"
+    assert run.completed_at is not None
+
+
+async def test_execute_run_fails_on_truncated_dataset_but_keeps_read_cases(run_db):
+    data_json = json.dumps([_case("good"), _case("good")])[:-20]
+    run_id = _add_run(run_db, data_json, 2)
+
+    await _execute(run_id)
+
+    with Session(run_db) as session:
+        run = session.get(EvalRun, run_id)
+        saved = session.exec(select(EvalResult)).all()
+    assert [r.test_case_index for r in saved] == [0]
+    assert run.status == "failed"
+    assert run.error
+    assert run.completed_cases == 1
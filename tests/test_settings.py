@@ -0,0 +1,76 @@
+"""Tests for settings page .env helpers."""
+
+from web.pages.settings import _iter_env_keys, _splice_env, _write_env
+
+
+def test_iter_env_keys_skips_comments_and_blank_lines():
+    text = "# FOO=commented\nFOO=1\n\n  BAR = 2\nno equals sign\nBAZ=3"
+    assert [key for key, _, _ in _iter_env_keys(text)] == ["FOO", "BAR", "BAZ"]
+
+
+def test_iter_env_keys_spans_cover_the_line():
+    text = "FOO=1\nBAR=22\n"
+    assert [text[start:end] for _, start, end in _iter_env_keys(text)] == ["FOO=1", "BAR=22"]
+
+
+def test_splice_env_replaces_and_appends():
+    text = "# keep me\nFOO=old\nBAR=keep"
+    spans = {key: (start, end) for key, start, end in _iter_env_keys(text)}
+    out = "".join(_splice_env(text, [(*spans["FOO"], "FOO=new")], ["NEW=1"]))
+    assert out == "# keep me\nFOO=new\nBAR=keep\nNEW=1\n"
+
+
+def test_splice_env_into_empty_file():
+    assert "".join(_splice_env("", [], ["KEY=value"])) == "KEY=value\n"
+
+
+def test_write_env_replaces_file_and_keeps_mode(tmp_path):
+    env_file = tmp_path / ".env"
+    env_file.write_text("OLD=1\n")
+    env_file.chmod(0o640)
+    _write_env(env_file, ["NEW=", "2", "\n"])
+    assert env_file.read_text() == "NEW=2\n"
+    assert env_file.stat().st_mode & 0o777 == 0o640
+    assert [p.name for p in tmp_path.iterdir()] == [".env"]
+
+
+def test_set_edit_value_updates_one_field():
+    from web.pages.settings import SettingsState
+
+    state = SettingsState()
+    state.set_edit_value(2, "secret")
+    assert state.edit_values[2] == "secret"
+    assert "edit_values" in state.dirty_vars
+    assert SettingsState().edit_values[2] == ""
+
+
+def test_has_test_message_tracks_blank_input():
+    from web.pages.settings import SettingsState
+
+    state = SettingsState()
+    state.set_test_agent_message("  \t")
+    assert state.has_test_message is False
+    state.set_test_agent_message(" hi ")
+    assert state.has_test_message is True
+    state.set_test_agent_message("")
+    assert state.has_test_message is False
+
+
+def test_save_settings_clears_schema_lookup(tmp_path, monkeypatch):
+    from web.pages.settings import SettingsState
+
+    env_file = tmp_path / ".env"
+    monkeypatch.setattr("web.pages.settings._find_env_file", lambda: env_file)
+    monkeypatch.setattr("web.pages.settings._ENV", {})
+
+    state = SettingsState()
+    state.resolved_schema_name = "cr123_oldAgent"
+    state.schema_resolve_error = "stale"
+    state.manual_schema_name = "cr123_typed"
+    state.save_settings()
+
+    assert state.save_success is True
+    assert env_file.exists()
+    assert state.resolved_schema_name == ""
+    assert state.schema_resolve_error == ""
+    assert state.manual_schema_name == ""
@@ -0,0 +1,31 @@
+"""Tests for setup page state."""
+
+from web.pages.setup import SetupState
+
+_VALID_URL = (
+    "https://copilotstudio.preview.microsoft.com"
+    "/environments/2dd2ec79-3f5b-e241-b733-f7e34196b913"
+    "/bots/9a237ebb-6014-f111-8341-000d3a340477/overview"
+)
+
+
+def test_parse_url_sets_and_clears_error_flag():
+    state = SetupState()
+    state.agent_url = "not a url"
+    state.parse_url()
+    assert state.has_url_error is True
+    assert state.url_error
+    assert state.current_step == 1
+
+    state.agent_url = _VALID_URL
+    state.parse_url()
+    assert state.has_url_error is False
+    assert state.url_error == ""
+    assert state.current_step == 2
+
+
+def test_sign_in_again_forgets_reused_sign_in():
+    state = SetupState()
+    state._signed_in_env = "env-id"
+    assert state.sign_in_again() == SetupState.provision
+    assert state._signed_in_env == ""
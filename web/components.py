@@ -183,16 +183,19 @@ def layout(page_content: rx.Component) -> rx.Component:
     )
 
 
-def status_badge(status: str) -> rx.Component:
-    color_map = {
-        "pending": "gray",
-        "running": "blue",
-        "completed": "green",
-        "failed": "red",
-    }
+STATUS_COLORS = {
+    "pending": "gray",
+    "running": "blue",
+    "completed": "green",
+    "failed": "red",
+}
+
+
+def status_badge(status: str, color: rx.Var | str | None = None) -> rx.Component:
+    """Status badge; pass a precomputed color when status is a state var."""
     return rx.badge(
         status,
-        color_scheme=color_map.get(status, "gray"),
+        color_scheme=color if color is not None else STATUS_COLORS.get(status, "gray"),
         variant="soft",
     )
 
@@ -4,6 +4,7 @@ from datetime import UTC, datetime
 
 import reflex as rx
 import sqlmodel
+from sqlalchemy import Index, Update
 
 
 class Dataset(rx.Model, table=True):
@@ -24,18 +25,39 @@ class EvalRun(rx.Model, table=True):
     avg_score: float = 0.0
     total_cases: int = 0
     completed_cases: int = 0
+    progress_pct: int = 0  # kept in step with completed_cases by the progress UPDATE
     error: str = ""
     created_at: datetime = sqlmodel.Field(default_factory=lambda: datetime.now(UTC))
     completed_at: datetime | None = None
 
 
 class EvalResult(rx.Model, table=True):
+    # Results are always read per run, usually in case order
+    __table_args__ = (Index("ix_evalresult_run_case", "eval_run_id", "test_case_index"),)
+
     eval_run_id: int
     test_case_index: int = 0
     input_json: str = "[]"  # JSON string: the turns sent
     actual_output: str = ""
     expected_output: str = ""
     scores_json: str = "{}"  # JSON string: per-metric scores + reasons
+    avg_score: float | None = None  # mean of scores_json; None when the case errored
     activities_json: str = "[]"  # JSON string: raw D2E activities captured per case
     passed: bool = False
     duration_seconds: float = 0.0
+
+
+def advance_progress(run_id: int, n: int = 1) -> Update:
+    """Atomic completed_cases += n that also refreshes the stored progress_pct."""
+    completed = EvalRun.completed_cases + n
+    return (
+        sqlmodel.update(EvalRun)
+        .where(EvalRun.id == run_id)
+        .values(
+            completed_cases=completed,
+            progress_pct=sqlmodel.case(
+                (EvalRun.total_cases > 0, completed * 100 // EvalRun.total_cases),
+                else_=0,
+            ),
+        )
+    )
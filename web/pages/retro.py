@@ -9,7 +9,7 @@ import reflex as rx
 from sqlmodel import select
 
 from web.components import empty_state, layout, page_header, stat_card, status_badge
-from web.models import EvalResult, EvalRun
+from web.models import EvalResult, EvalRun, advance_progress
 from web.state import State
 
 
@@ -253,11 +253,8 @@ class RetroState(State):
                 async with self:
                     self.total_skipped += 1
                     with rx.session() as session:
-                        run_obj = session.get(EvalRun, run_id)
-                        if run_obj:
-                            run_obj.completed_cases += 1
-                            session.add(run_obj)
-                            session.commit()
+                        session.execute(advance_progress(run_id))
+                        session.commit()
                 continue
 
             metric_results = run_tier1_metrics(test_case, expected_topic=expected_topic)
@@ -312,10 +309,7 @@ class RetroState(State):
                         duration_seconds=0.0,
                     )
                     session.add(result)
-                    run_obj = session.get(EvalRun, run_id)
-                    if run_obj:
-                        run_obj.completed_cases += 1
-                        session.add(run_obj)
+                    session.execute(advance_progress(run_id))
                     session.commit()
 
         # Step 8: Finalize run
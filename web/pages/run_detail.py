@@ -5,19 +5,29 @@ import json
 from datetime import datetime
 
 import reflex as rx
-from sqlmodel import select
+from sqlmodel import func, select
 
-from web.components import layout, status_badge
+from web.components import STATUS_COLORS, layout, status_badge
 from web.models import Dataset, EvalResult, EvalRun
 from web.state import State
 
+# Outputs are shipped to the browser truncated; the full text is loaded on expand
+_OUTPUT_PREVIEW_CHARS = 200
+
+_ROLE = {"user": "User"}
+
+# Activity types that are conversation plumbing rather than tool activity
+_SKIP_TYPES = frozenset({"message", "end_of_conversation", "typing", None})
+
+# (color, exclusive upper bound) — scores at or above the last bound are green
+_SCORE_COLORS = (("red", 0.4), ("yellow", 0.7))
+
 
 def _color_for_score(val: float) -> str:
-    if val >= 0.7:
-        return "green"
-    if val >= 0.4:
-        return "yellow"
-    return "red"
+    for color, upper in _SCORE_COLORS:
+        if val < upper:
+            return color
+    return "green"
 
 
 class ScoreItem(rx.Base):
@@ -30,6 +40,20 @@ class ScoreItem(rx.Base):
     bar_width: str = "0%"
 
 
+def _score_item(mname: str, data: dict | float) -> ScoreItem:
+    val = data.get("score", 0) if isinstance(data, dict) else 0
+    pct = round(val * 100)
+    return ScoreItem(
+        name=mname.replace("_", " ").title(),
+        raw=mname,
+        val_pct=str(pct),
+        val_text=f"{val:.0%}",
+        color=_color_for_score(val),
+        reason=data.get("reason", "") if isinstance(data, dict) else "",
+        bar_width=f"{pct}%",
+    )
+
+
 class ConvTurn(rx.Base):
     role: str = ""
     content: str = ""
@@ -43,6 +67,7 @@ class ToolLine(rx.Base):
 
 
 class ResultRow(rx.Base):
+    id: int = 0
     index: int = 0
     num: str = ""
     passed: bool = False
@@ -64,6 +89,13 @@ class RunDetailState(State):
     dataset_name: str = ""
     is_live: bool = False
 
+    # Full actual/expected output of the expanded result. Kept out of results
+    # so expanding a row doesn't re-send the whole list.
+    expanded_actual_output: str = ""
+    expanded_expected_output: str = ""
+    # Full outputs already fetched, per test case index
+    _full_outputs: dict[int, dict[str, str]] = {}
+
     def _load_run_data(self, run_id: int) -> None:
         """Load run + results from DB into state. Does not touch is_live."""
         with rx.session() as session:
@@ -78,6 +110,7 @@ class RunDetailState(State):
                 "id": run_obj.id,
                 "name": run_obj.name,
                 "status": run_obj.status,
+                "status_color": STATUS_COLORS.get(run_obj.status, "gray"),
                 "avg_score": (
                     f"{run_obj.avg_score:.1%}"
                     if run_obj.avg_score > 0 else "—"
@@ -86,17 +119,30 @@ class RunDetailState(State):
                 "progress": (
                     f"{run_obj.completed_cases}/{run_obj.total_cases}"
                 ),
-                "progress_pct": (
-                    round(run_obj.completed_cases / run_obj.total_cases * 100)
-                    if run_obj.total_cases > 0 else 0
-                ),
+                # Stored floor value, so the header matches the runs table
+                "progress_pct": run_obj.progress_pct,
                 "error": run_obj.error or "",
+                "has_error": bool(run_obj.error),
                 "created": run_obj.created_at.strftime("%d-%m-%Y %H:%M"),
                 "metrics": run_obj.metrics_json or "[]",
             }
 
             result_rows = session.exec(
-                select(EvalResult)
+                select(
+                    EvalResult.id,
+                    EvalResult.test_case_index,
+                    EvalResult.input_json,
+                    func.substr(EvalResult.actual_output, 1, _OUTPUT_PREVIEW_CHARS).label(
+                        "actual_output"
+                    ),
+                    func.substr(EvalResult.expected_output, 1, _OUTPUT_PREVIEW_CHARS).label(
+                        "expected_output"
+                    ),
+                    EvalResult.scores_json,
+                    EvalResult.activities_json,
+                    EvalResult.passed,
+                    EvalResult.duration_seconds,
+                )
                 .where(EvalResult.eval_run_id == run_id)
                 .order_by(EvalResult.test_case_index)
             ).all()
@@ -106,28 +152,14 @@ class RunDetailState(State):
                 scores_raw = json.loads(r.scores_json) if r.scores_json else {}
 
                 # Build structured score items for visual rendering
-                score_items: list[ScoreItem] = []
-                overall_color = "gray"
-                for mname, data in scores_raw.items():
-                    val = data.get("score", 0) if isinstance(data, dict) else 0
-                    reason = data.get("reason", "") if isinstance(data, dict) else ""
-                    color = _color_for_score(val)
-                    pct = round(val * 100)
-                    score_items.append(ScoreItem(
-                        name=mname.replace("_", " ").title(),
-                        raw=mname,
-                        val_pct=str(pct),
-                        val_text=f"{val:.0%}",
-                        color=color,
-                        reason=reason,
-                        bar_width=f"{pct}%",
-                    ))
-                    if color == "red":
-                        overall_color = "red"
-                    elif color == "yellow" and overall_color != "red":
-                        overall_color = "yellow"
-                    elif overall_color == "gray":
-                        overall_color = "green"
+                score_items = [_score_item(m, data) for m, data in scores_raw.items()]
+                colors = {it.color for it in score_items}
+                overall_color = (
+                    "red" if "red" in colors
+                    else "yellow" if "yellow" in colors
+                    else "green" if colors
+                    else "gray"
+                )
 
                 scores_summary = " · ".join(
                     f"{it.raw}: {it.val_text}"
@@ -138,21 +170,17 @@ class RunDetailState(State):
                 input_turns = (
                     json.loads(r.input_json) if r.input_json else []
                 )
-                conv_turns: list[ConvTurn] = []
-                for t in input_turns:
-                    role = t.get("role", "user")
-                    conv_turns.append(ConvTurn(
-                        role="User" if role == "user" else "Assistant",
+                conv_turns = [
+                    ConvTurn(
+                        role=_ROLE.get(t.get("role", "user"), "Assistant"),
                         content=t.get("content", ""),
-                        is_user=role == "user",
-                    ))
+                        is_user=t.get("role", "user") == "user",
+                    )
+                    for t in input_turns
+                ]
 
                 raw_activities = json.loads(r.activities_json) if r.activities_json else []
-                tool_activities = [
-                    a
-                    for a in raw_activities
-                    if a.get("type") not in ("message", "end_of_conversation", "typing", None)
-                ]
+                tool_activities = [a for a in raw_activities if a.get("type") not in _SKIP_TYPES]
                 tool_lines: list[ToolLine] = []
                 if tool_activities:
                     for a in tool_activities:
@@ -207,6 +235,7 @@ class RunDetailState(State):
                     tool_lines.append(ToolLine(icon="minus", text="No tool activity captured", color="gray"))
 
                 self.results.append(ResultRow(
+                    id=r.id,
                     index=r.test_case_index,
                     num=str(r.test_case_index + 1),
                     passed=r.passed,
@@ -228,6 +257,7 @@ class RunDetailState(State):
         except (ValueError, TypeError):
             return
 
+        self._full_outputs = {}
         self._load_run_data(run_id)
         self.expanded_result = -1  # reset on initial page load only
 
@@ -251,6 +281,27 @@ class RunDetailState(State):
             self.expanded_result = -1
         else:
             self.expanded_result = index
+            self.load_full_output(index)
+
+    def load_full_output(self, index: int) -> None:
+        """Load the full output text of one result for its expanded view."""
+        row = next((row for row in self.results if row.index == index), None)
+        if row is None:
+            return
+
+        full = self._full_outputs.get(index)
+        if full is None:
+            with rx.session() as session:
+                # A result deleted since the page loaded falls back to its preview
+                result = session.get(EvalResult, row.id) or row
+                full = {
+                    "actual_output": result.actual_output or "",
+                    "expected_output": result.expected_output or "",
+                }
+            self._full_outputs[index] = full
+
+        self.expanded_actual_output = full["actual_output"]
+        self.expanded_expected_output = full["expected_output"]
 
     def rerun(self):
         from web.pages.runs import RunState
@@ -280,17 +331,35 @@ class RunDetailState(State):
                 created_at=datetime.utcnow(),
             )
             session.add(run)
-            session.commit()
-            session.refresh(run)
+            # The flush INSERT returns the new id, so no reload SELECT is needed
+            session.flush()
             new_run_id = run.id
+            session.commit()
 
         yield rx.redirect(f"/runs/{new_run_id}")
         yield RunState.execute_run(new_run_id)
 
     def export_results(self) -> rx.Component:
+        # Rows only hold output previews — pull the full text for the export
+        with rx.session() as session:
+            outputs = {
+                r.test_case_index: {
+                    "actual_output": r.actual_output or "",
+                    "expected_output": r.expected_output or "",
+                }
+                for r in session.exec(
+                    select(
+                        EvalResult.test_case_index,
+                        EvalResult.actual_output,
+                        EvalResult.expected_output,
+                    ).where(EvalResult.eval_run_id == self.run.get("id"))
+                ).all()
+            }
         export_data = {
             "run": self.run,
-            "results": self.results,
+            "results": [
+                {**row.dict(), **outputs.get(row.index, {})} for row in self.results
+            ],
         }
         return rx.download(
             data=json.dumps(export_data, indent=2, default=str),
@@ -476,7 +545,7 @@ def _expanded_content(r: rx.Var) -> rx.Component:
         rx.cond(
             r["has_error"],
             rx.callout(
-                r["actual_output"].to(str),
+                RunDetailState.expanded_actual_output,
                 icon="triangle_alert",
                 color_scheme="red",
                 width="100%",
@@ -507,7 +576,7 @@ def _expanded_content(r: rx.Var) -> rx.Component:
         ),
         # Expected vs Actual
         rx.cond(
-            r["expected_output"].to(str) != "",
+            RunDetailState.expanded_expected_output != "",
             rx.hstack(
                 rx.vstack(
                     rx.hstack(
@@ -518,7 +587,7 @@ def _expanded_content(r: rx.Var) -> rx.Component:
                     ),
                     rx.box(
                         rx.text(
-                            r["expected_output"].to(str),
+                            RunDetailState.expanded_expected_output,
                             size="2",
                             white_space="pre-wrap",
                             color="var(--gray-a11)",
@@ -541,7 +610,7 @@ def _expanded_content(r: rx.Var) -> rx.Component:
                     ),
                     rx.box(
                         rx.text(
-                            r["actual_output"].to(str),
+                            RunDetailState.expanded_actual_output,
                             size="2",
                             white_space="pre-wrap",
                             color="var(--gray-a11)",
@@ -784,7 +853,7 @@ def _header_section() -> rx.Component:
         rx.hstack(
             rx.hstack(
                 rx.heading(RunDetailState.run["name"], size="6", letter_spacing="-0.02em"),
-                status_badge(RunDetailState.run["status"]),
+                status_badge(RunDetailState.run["status"], RunDetailState.run["status_color"]),
                 spacing="3",
                 align="center",
             ),
@@ -813,7 +882,7 @@ def _header_section() -> rx.Component:
             width="100%",
         ),
         rx.cond(
-            RunDetailState.run["error"].to(str) != "",
+            RunDetailState.run["has_error"],
             rx.callout(
                 RunDetailState.run["error"],
                 icon="triangle_alert",
@@ -2,15 +2,18 @@
 
 import asyncio
 import json
+import re
 import time
+from collections.abc import Iterator
 from datetime import datetime
+from typing import Any
 
 import reflex as rx
 from loguru import logger
-from sqlmodel import select
+from sqlmodel import func, select
 
-from web.components import empty_state, layout, page_header, status_badge
-from web.models import Dataset, EvalResult, EvalRun
+from web.components import STATUS_COLORS, empty_state, layout, page_header, status_badge
+from web.models import Dataset, EvalResult, EvalRun, advance_progress
 from web.state import State
 
 AVAILABLE_METRICS = [
@@ -30,6 +33,47 @@ AVAILABLE_METRICS = [
     "bias",
     "faithfulness",
 ]
+AVAILABLE_METRICS_DISPLAY = [(m, m.replace("_", " ").title()) for m in AVAILABLE_METRICS]
+
+# Eval results are written by one flusher per run, in batches of up to this
+# many rows or whatever arrived within the flush window, whichever comes first
+_RESULT_BATCH_SIZE = 50
+_RESULT_FLUSH_SECONDS = 0.5
+
+# The runs table lists only the most recent runs
+_RUNS_LIMIT = 100
+
+_JSON_DECODER = json.JSONDecoder()
+# Activities are decoded D2E payloads: acyclic, so the cycle check is skipped,
+# and compact separators keep the stored blob small
+_ACTIVITIES_ENCODER = json.JSONEncoder(
+    default=str, check_circular=False, separators=(",", ":")
+)
+_JSON_WHITESPACE = re.compile(r"[ \t\n\r]*")
+
+
+def _iter_json_array(text: str) -> Iterator[Any]:
+    """Yield the elements of a JSON array one at a time.
+
+    Each element is decoded only when requested, so the first case of a large
+    dataset can be dispatched without parsing the whole blob up front.
+    """
+    pos = _JSON_WHITESPACE.match(text, 0).end()
+    if text[pos:pos + 1] != "[":
+        raise ValueError("Expected a JSON array")
+    pos = _JSON_WHITESPACE.match(text, pos + 1).end()
+    if text[pos:pos + 1] == "]":
+        return
+    while True:
+        item, pos = _JSON_DECODER.raw_decode(text, pos)
+        yield item
+        pos = _JSON_WHITESPACE.match(text, pos).end()
+        sep = text[pos:pos + 1]
+        if sep == "]":
+            return
+        if sep != ",":
+            raise ValueError(f"Expected ',' or ']' at position {pos}")
+        pos = _JSON_WHITESPACE.match(text, pos + 1).end()
 
 
 class RunState(State):
@@ -41,7 +85,7 @@ class RunState(State):
     # Create form
     new_run_name: str = ""
     selected_dataset_id: int = 0
-    selected_metrics: list[str] = ["answer_relevancy"]
+    selected_metrics: set[str] = {"answer_relevancy"}
     threshold: float = 0.5
     delay_seconds: float = 1.0
     max_concurrent: int = 3
@@ -56,38 +100,64 @@ class RunState(State):
 
     def load_runs(self) -> None:
         with rx.session() as session:
-            rows = session.exec(select(EvalRun).order_by(EvalRun.created_at.desc())).all()
+            # Only the columns the table shows; the JSON blobs stay in the DB
+            rows = session.exec(
+                select(
+                    EvalRun.id,
+                    EvalRun.name,
+                    EvalRun.status,
+                    EvalRun.avg_score,
+                    EvalRun.total_cases,
+                    EvalRun.completed_cases,
+                    EvalRun.progress_pct,
+                    EvalRun.error,
+                    EvalRun.created_at,
+                )
+                .order_by(EvalRun.created_at.desc())
+                .limit(_RUNS_LIMIT)
+            ).all()
+            datasets = session.exec(select(Dataset).order_by(Dataset.name)).all()
+
         self.runs = [
             {
                 "id": r.id,
                 "name": r.name,
                 "status": r.status,
+                "status_color": STATUS_COLORS.get(r.status, "gray"),
                 "avg_score": f"{r.avg_score:.1%}" if r.avg_score > 0 else "—",
                 "progress": f"{r.completed_cases}/{r.total_cases}",
-                "progress_pct": (
-                    round(r.completed_cases / r.total_cases * 100) if r.total_cases > 0 else 0
-                ),
+                "progress_pct": r.progress_pct,
                 "error": r.error,
                 "created": r.created_at.strftime("%d-%m-%Y %H:%M"),
             }
             for r in rows
         ]
 
-        # Load datasets for the select dropdown
-        with rx.session() as ds_session:
-            datasets = ds_session.exec(select(Dataset).order_by(Dataset.name)).all()
-            self.dataset_options = [
-                f"{d.name} ({d.num_cases} cases, {d.eval_type})" for d in datasets
-            ]
-            self.dataset_id_map = {
-                f"{d.name} ({d.num_cases} cases, {d.eval_type})": d.id for d in datasets
-            }
+        # Datasets for the select dropdown
+        labels = [f"{d.name} ({d.num_cases} cases, {d.eval_type})" for d in datasets]
+        self.dataset_options = labels
+        self.dataset_id_map = dict(zip(labels, (d.id for d in datasets), strict=True))
+
+    def update_run_progress(self, run_id: int, completed: int, total: int) -> None:
+        """Update one run's progress cells in place instead of re-querying every run.
+
+        This only skips the database query: Reflex still marks the whole runs
+        var dirty and sends the full list to the client.
+        """
+        for i, row in enumerate(self.runs):
+            if row["id"] == run_id:
+                self.runs[i] = {
+                    **row,
+                    "progress": f"{completed}/{total}",
+                    "progress_pct": completed * 100 // total if total > 0 else 0,
+                }
+                return
 
     def open_create_dialog(self) -> None:
         self.show_create_dialog = True
         self.new_run_name = ""
         self.selected_dataset_id = 0
-        self.selected_metrics = ["answer_relevancy"]
+        self.selected_metrics = {"answer_relevancy"}
         self.threshold = 0.5
         self.delay_seconds = 1.0
         self.max_concurrent = 3
@@ -121,10 +191,10 @@ class RunState(State):
             self.max_concurrent = 3
 
     def set_metric(self, checked: bool, metric: str) -> None:
-        if checked and metric not in self.selected_metrics:
-            self.selected_metrics = self.selected_metrics + [metric]
-        elif not checked and metric in self.selected_metrics:
-            self.selected_metrics = [m for m in self.selected_metrics if m != metric]
+        if checked:
+            self.selected_metrics.add(metric)
+        else:
+            self.selected_metrics.discard(metric)
 
     def toggle_compare(self, run_id: int) -> None:
         if run_id in self.compare_selected:
@@ -226,9 +296,10 @@ class RunState(State):
                 created_at=datetime.utcnow(),
             )
             session.add(run)
-            session.commit()
-            session.refresh(run)
+            # The flush INSERT returns the new id, so no reload SELECT is needed
+            session.flush()
             new_run_id = run.id
+            session.commit()
 
         self.load_runs()
         return RunState.execute_run(new_run_id)
@@ -254,7 +325,9 @@ class RunState(State):
                 name=self.new_run_name.strip(),
                 dataset_id=self.selected_dataset_id,
                 status="pending",
-                metrics_json=json.dumps(self.selected_metrics),
+                metrics_json=json.dumps(
+                    [m for m in AVAILABLE_METRICS if m in self.selected_metrics]
+                ),
                 config_json=json.dumps(
                     {
                         "threshold": self.threshold,
@@ -266,9 +339,10 @@ class RunState(State):
                 created_at=datetime.utcnow(),
             )
             session.add(run)
-            session.commit()
-            session.refresh(run)
+            # The flush INSERT returns the new id, so no reload SELECT is needed
+            session.flush()
             run_id = run.id
+            session.commit()
 
         self.show_create_dialog = False
         self.load_runs()
@@ -296,110 +370,235 @@ class RunState(State):
                     session.commit()
                     return
 
-                cases = json.loads(dataset.data_json)
+                cases = _iter_json_array(dataset.data_json)
                 metrics = json.loads(run.metrics_json)
                 config = json.loads(run.config_json)
                 threshold = config.get("threshold", 0.5)
                 delay = config.get("delay_seconds", 1.0)
                 max_concurrent = config.get("max_concurrent", 1)
+                total_cases = run.total_cases
+
+        case_queue: asyncio.Queue[tuple[int, dict]] = asyncio.Queue(max_concurrent)
+        # Cases gather their AI metrics, so judge calls share their own cap to
+        # keep max_concurrent as the limit on requests to Azure OpenAI
+        judge_limit = asyncio.Semaphore(max_concurrent)
+        result_queue: asyncio.Queue[EvalResult | None] = asyncio.Queue()
+        lost_results = 0
+
+        async def flush_results() -> None:
+            """Drain queued results into the DB until the None sentinel arrives.
+
+            The flusher is the only DB writer while cases run, so it keeps a
+            single session for the whole run instead of one per case. Each
+            batch is written on a worker thread so the commit doesn't stall
+            the conversations still running on the event loop. A batch that
+            fails to write is rolled back and counted, so one bad commit
+            doesn't stop the rest of the run from being saved.
+            """
+            nonlocal lost_results
+            loop = asyncio.get_running_loop()
+            completed = 0
+            with rx.session() as session:
 
-        all_scores: list[float] = []
-        sem = asyncio.Semaphore(max_concurrent)
+                def write_batch(rows: list[EvalResult]) -> bool:
+                    try:
+                        session.bulk_save_objects(rows)
+                        session.execute(advance_progress(run_id, len(rows)))
+                        session.commit()
+                    except Exception as e:
+                        session.rollback()
+                        logger.error(f"Run {run_id}: failed to save {len(rows)} results: {e}")
+                        return False
+                    return True
+
+                done = False
+                while not done:
+                    row = await result_queue.get()
+                    rows: list[EvalResult] = []
+                    deadline = loop.time() + _RESULT_FLUSH_SECONDS
+                    while row is not None:
+                        rows.append(row)
+                        if len(rows) >= _RESULT_BATCH_SIZE:
+                            break
+                        try:
+                            row = await asyncio.wait_for(
+                                result_queue.get(), deadline - loop.time()
+                            )
+                        except TimeoutError:
+                            break
+                    else:
+                        # Loop ended on the sentinel: write what we have and stop
+                        done = True
+                    if rows:
+                        if not await asyncio.to_thread(write_batch, rows):
+                            lost_results += len(rows)
+                            continue
+                        completed += len(rows)
+                        async with self:
+                            self.update_run_progress(run_id, completed, total_cases)
+
+        def error_result(idx: int, case: dict, e: Exception) -> EvalResult:
+            # Uploaded datasets are only checked to be a list, so the case
+            # itself may be what failed
+            if isinstance(case, dict):
+                turns_json = json.dumps(case.get("turns", []), default=str)
+                expected = str(case.get("expected_output", ""))
+            else:
+                turns_json, expected = "[]", ""
+            return EvalResult(
+                eval_run_id=run_id,
+                test_case_index=idx,
+                input_json=turns_json,
+                actual_output=f"Error: {e}",
+                expected_output=expected,
+                scores_json="{}",
+                passed=False,
+                duration_seconds=0,
+            )
 
         async def process_case(idx: int, case: dict) -> None:
-            async with sem:
+            try:
+                turns = case.get("turns", [])
+                expected = case.get("expected_output", "")
+                context = case.get("context", "")
+                expected_topic = case.get("expected_topic", "")
+                keywords_any = case.get("keywords_any", [])
+                keywords_all = case.get("keywords_all", [])
+
+                start = time.time()
+                conversation, activities = await run_conversation(turns)
+                actual_output = conversation[-1]["content"] if conversation else ""
+                duration = time.time() - start
+
+                scores = await evaluate_case(
+                    turns=turns,
+                    conversation=conversation,
+                    expected_output=expected,
+                    context=context,
+                    metric_names=metrics,
+                    threshold=threshold,
+                    activities=activities,
+                    expected_topic=expected_topic,
+                    keywords_any=keywords_any,
+                    keywords_all=keywords_all,
+                    judge_limit=judge_limit,
+                )
+
+                avg_case_score = (
+                    sum(s.get("score", 0) for s in scores.values()) / len(scores)
+                    if scores
+                    else 0
+                )
+                passed = avg_case_score >= threshold
+
+                result_queue.put_nowait(EvalResult(
+                    eval_run_id=run_id,
+                    test_case_index=idx,
+                    input_json=json.dumps(turns),
+                    actual_output=actual_output,
+                    expected_output=expected,
+                    scores_json=json.dumps(scores),
+                    avg_score=avg_case_score,
+                    activities_json=_ACTIVITIES_ENCODER.encode(activities),
+                    passed=passed,
+                    duration_seconds=round(duration, 2),
+                ))
+
+            except Exception as e:
+                logger.error(f"Case {idx} failed: {e}")
+                result_queue.put_nowait(error_result(idx, case, e))
+
+        async def worker() -> None:
+            # Each worker spaces its own case starts by `delay`; there is no
+            # global stagger, so a free worker never waits on the others.
+            # Workers never exit on their own: they are cancelled once the
+            # queue is drained, so the producer can't block on a dead pool.
+            loop = asyncio.get_running_loop()
+            next_allowed = 0.0
+            while True:
+                idx, case = await case_queue.get()
                 try:
-                    turns = case.get("turns", [])
-                    expected = case.get("expected_output", "")
-                    context = case.get("context", "")
-                    expected_topic = case.get("expected_topic", "")
-                    keywords_any = case.get("keywords_any", [])
-                    keywords_all = case.get("keywords_all", [])
-
-                    start = time.time()
-                    conversation, activities = await run_conversation(turns)
-                    actual_output = conversation[-1]["content"] if conversation else ""
-                    duration = time.time() - start
-
-                    scores = await evaluate_case(
-                        turns=turns,
-                        conversation=conversation,
-                        expected_output=expected,
-                        context=context,
-                        metric_names=metrics,
-                        threshold=threshold,
-                        activities=activities,
-                        expected_topic=expected_topic,
-                        keywords_any=keywords_any,
-                        keywords_all=keywords_all,
-                    )
-
-                    avg_case_score = (
-                        sum(s.get("score", 0) for s in scores.values()) / len(scores)
-                        if scores
-                        else 0
-                    )
-                    passed = avg_case_score >= threshold
-
-                    async with self:
-                        all_scores.append(avg_case_score)
-                        with rx.session() as session:
-                            result = EvalResult(
-                                eval_run_id=run_id,
-                                test_case_index=idx,
-                                input_json=json.dumps(turns),
-                                actual_output=actual_output,
-                                expected_output=expected,
-                                scores_json=json.dumps(scores),
-                                activities_json=json.dumps(activities, default=str),
-                                passed=passed,
-                                duration_seconds=round(duration, 2),
-                            )
-                            session.add(result)
-                            run = session.get(EvalRun, run_id)
-                            run.completed_cases += 1
-                            session.add(run)
-                            session.commit()
-
+                    wait = next_allowed - loop.time()
+                    if wait > 0:
+                        await asyncio.sleep(wait)
+                    next_allowed = loop.time() + delay
+                    await process_case(idx, case)
                 except Exception as e:
                     logger.error(f"Case {idx} failed: {e}")
-                    async with self:
-                        with rx.session() as session:
-                            result = EvalResult(
-                                eval_run_id=run_id,
-                                test_case_index=idx,
-                                input_json=json.dumps(case.get("turns", [])),
-                                actual_output=f"Error: {e}",
-                                expected_output=case.get("expected_output", ""),
-                                scores_json="{}",
-                                passed=False,
-                                duration_seconds=0,
-                            )
-                            session.add(result)
-                            run = session.get(EvalRun, run_id)
-                            run.completed_cases += 1
-                            session.add(run)
-                            session.commit()
-
-        tasks = []
-        for i, case in enumerate(cases):
-            tasks.append(asyncio.create_task(process_case(i, case)))
-            if delay > 0 and i < len(cases) - 1:
-                await asyncio.sleep(delay)
-
-        await asyncio.gather(*tasks, return_exceptions=True)
-
-        async with self:
+                    result_queue.put_nowait(error_result(idx, case, e))
+                finally:
+                    case_queue.task_done()
+
+        # A fixed pool of max_concurrent workers pulls from a bounded queue, so
+        # only max_concurrent cases are ever in flight regardless of dataset size
+        flusher = asyncio.create_task(flush_results())
+        workers = [asyncio.create_task(worker()) for _ in range(max_concurrent)]
+        error = ""
+        try:
+            try:
+                for i, case in enumerate(cases):
+                    await case_queue.put((i, case))
+            except Exception as e:
+                # Reading the dataset failed partway; still save what was queued
+                logger.error(f"Run {run_id} failed: {e}")
+                error = str(e)
+            await case_queue.join()
+        finally:
+            # Also runs on cancellation, so the workers and the flusher always stop
+            for task in workers:
+                task.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+            result_queue.put_nowait(None)
+            (flush_error,) = await asyncio.gather(flusher, return_exceptions=True)
+        if isinstance(flush_error, Exception) and not error:
+            logger.error(f"Run {run_id} failed: {flush_error}")
+            error = str(flush_error)
+        if lost_results and not error:
+            error = f"{lost_results} results could not be saved"
+
+        def complete_run() -> None:
             with rx.session() as session:
                 run = session.get(EvalRun, run_id)
-                run.status = "completed"
-                run.avg_score = sum(all_scores) / len(all_scores) if all_scores else 0
+                run.status = "failed" if error else "completed"
+                run.error = error
+                # Errored cases have a NULL avg_score, which AVG skips
+                run.avg_score = session.exec(
+                    select(func.avg(EvalResult.avg_score)).where(
+                        EvalResult.eval_run_id == run_id
+                    )
+                ).one() or 0
                 run.completed_at = datetime.utcnow()
                 session.add(run)
                 session.commit()
+
+        await asyncio.to_thread(complete_run)
+        async with self:
             self.load_runs()
 
 
+def _metrics_checklist() -> rx.Component:
+    """Metric checkboxes for the new-run dialog.
+
+    Not wrapped in rx.memo: the body reads RunState.selected_metrics, so a
+    memo would subscribe to RunState and re-render on every change anyway.
+    """
+    return rx.vstack(
+        rx.foreach(
+            AVAILABLE_METRICS_DISPLAY,
+            lambda item: rx.hstack(
+                rx.checkbox(
+                    item[1],
+                    checked=RunState.selected_metrics.contains(item[0]),
+                    on_change=lambda val: RunState.set_metric(val, item[0]),
+                ),
+                spacing="2",
+            ),
+        ),
+        spacing="2",
+        width="100%",
+    )
+
+
 def create_run_dialog() -> rx.Component:
     return rx.dialog.root(
         rx.dialog.content(
@@ -418,21 +617,7 @@ def create_run_dialog() -> rx.Component:
                     width="100%",
                 ),
                 rx.text("Metrics", size="2", weight="medium"),
-                rx.vstack(
-                    *[
-                        rx.hstack(
-                            rx.checkbox(
-                                metric.replace("_", " ").title(),
-                                checked=RunState.selected_metrics.contains(metric),
-                                on_change=lambda val, m=metric: RunState.set_metric(val, m),
-                            ),
-                            spacing="2",
-                        )
-                        for metric in AVAILABLE_METRICS
-                    ],
-                    spacing="2",
-                    width="100%",
-                ),
+                _metrics_checklist(),
                 rx.hstack(
                     rx.vstack(
                         rx.text("Threshold", size="2", weight="medium"),
@@ -513,6 +698,83 @@ def _score_cell(avg_score: rx.Var) -> rx.Component:
     )
 
 
+def _run_row(r: rx.Var[dict]) -> rx.Component:
+    """One runs-table row.
+
+    Not wrapped in rx.memo: the checkbox reads RunState.compare_selected, and
+    each runs delta hands every row a new dict, so memoizing saves nothing.
+    """
+    return rx.table.row(
+        rx.table.cell(
+            rx.checkbox(
+                checked=RunState.compare_selected.contains(r["id"]),
+                on_change=lambda _: RunState.toggle_compare(r["id"]),
+            ),
+        ),
+        rx.table.cell(
+            rx.link(
+                rx.hstack(
+                    rx.text(r["name"], weight="medium", size="2"),
+                    rx.icon(
+                        "arrow-up-right",
+                        size=12,
+                        color="var(--gray-a7)",
+                    ),
+                    spacing="1",
+                    align="center",
+                ),
+                href="/runs/" + r["id"].to(str),
+                underline="none",
+                class_name="run-name-link",
+            ),
+        ),
+        rx.table.cell(status_badge(r["status"], r["status_color"])),
+        rx.table.cell(
+            rx.vstack(
+                rx.box(
+                    rx.box(
+                        width=r["progress_pct"].to(str) + "%",
+                        height="100%",
+                        background="var(--accent-9)",
+                        border_radius="3px",
+                        transition="width 0.4s ease",
+                    ),
+                    width="90px",
+                    height="6px",
+                    border_radius="3px",
+                    background="var(--gray-a3)",
+                    overflow="hidden",
+                ),
+                rx.text(
+                    r["progress"],
+                    size="1",
+                    color="var(--gray-a8)",
+                    font_family="var(--font-mono)",
+                ),
+                spacing="1",
+            ),
+        ),
+        rx.table.cell(_score_cell(r["avg_score"])),
+        rx.table.cell(
+            rx.text(
+                r["created"],
+                size="1",
+                color="var(--gray-a8)",
+                font_family="var(--font-mono)",
+            ),
+        ),
+        rx.table.cell(
+            rx.button(
+                rx.icon("rotate-cw", size=14),
+                variant="ghost",
+                size="1",
+                color_scheme="gray",
+                on_click=RunState.rerun(r["id"]),
+            ),
+        ),
+    )
+
+
 def runs_table() -> rx.Component:
     return rx.table.root(
         rx.table.header(
@@ -527,78 +789,7 @@ def runs_table() -> rx.Component:
             ),
         ),
         rx.table.body(
-            rx.foreach(
-                RunState.runs,
-                lambda r: rx.table.row(
-                    rx.table.cell(
-                        rx.checkbox(
-                            checked=RunState.compare_selected.contains(r["id"]),
-                            on_change=lambda _: RunState.toggle_compare(r["id"]),
-                        ),
-                    ),
-                    rx.table.cell(
-                        rx.link(
-                            rx.hstack(
-                                rx.text(r["name"], weight="medium", size="2"),
-                                rx.icon(
-                                    "arrow-up-right",
-                                    size=12,
-                                    color="var(--gray-a7)",
-                                ),
-                                spacing="1",
-                                align="center",
-                            ),
-                            href="/runs/" + r["id"].to(str),
-                            underline="none",
-                            class_name="run-name-link",
-                        ),
-                    ),
-                    rx.table.cell(status_badge(r["status"])),
-                    rx.table.cell(
-                        rx.vstack(
-                            rx.box(
-                                rx.box(
-                                    width=r["progress_pct"].to(str) + "%",
-                                    height="100%",
-                                    background="var(--accent-9)",
-                                    border_radius="3px",
-                                    transition="width 0.4s ease",
-                                ),
-                                width="90px",
-                                height="6px",
-                                border_radius="3px",
-                                background="var(--gray-a3)",
-                                overflow="hidden",
-                            ),
-                            rx.text(
-                                r["progress"],
-                                size="1",
-                                color="var(--gray-a8)",
-                                font_family="var(--font-mono)",
-                            ),
-                            spacing="1",
-                        ),
-                    ),
-                    rx.table.cell(_score_cell(r["avg_score"])),
-                    rx.table.cell(
-                        rx.text(
-                            r["created"],
-                            size="1",
-                            color="var(--gray-a8)",
-                            font_family="var(--font-mono)",
-                        ),
-                    ),
-                    rx.table.cell(
-                        rx.button(
-                            rx.icon("rotate-cw", size=14),
-                            variant="ghost",
-                            size="1",
-                            color_scheme="gray",
-                            on_click=RunState.rerun(r["id"]),
-                        ),
-                    ),
-                ),
-            ),
+            rx.foreach(RunState.runs, _run_row),
         ),
         width="100%",
     )
@@ -2,9 +2,13 @@
 
 import os
 import re
+import tempfile
+from collections.abc import Iterator
+from functools import lru_cache
 from pathlib import Path
 
 import reflex as rx
+from dotenv import load_dotenv
 
 from web.components import layout, page_header
 from web.state import State
@@ -23,10 +27,20 @@ ENV_VARS = [
     ("AZURE_OPENAI_API_VERSION", "Azure OpenAI API Version"),
 ]
 
-SECRET_VARS = {"AZURE_AD_CLIENT_SECRET", "AZURE_OPENAI_API_KEY"}
+SECRET_VARS = frozenset({"AZURE_AD_CLIENT_SECRET", "AZURE_OPENAI_API_KEY"})
 
 # Build a flat list of var names for indexing
 VAR_NAMES = [v[0] for v in ENV_VARS]
+NAME_TO_POS = {name: i for i, name in enumerate(VAR_NAMES)}
+
+
+# Bound once; load_config reads every var through it
+_ENV = os.environ
+
+
+def _mask(value: str) -> str:
+    """Show only the first and last four characters of a secret."""
+    return f"{value[:4]}...{value[-4:]}" if len(value) > 8 else "****"
 
 
 _UUID_RE = re.compile(
@@ -35,8 +49,12 @@ _UUID_RE = re.compile(
 )
 
 
+@lru_cache(maxsize=1)
 def _find_env_file() -> Path:
-    """Locate .env file relative to the project root (CWD or parents)."""
+    """Locate .env file relative to the project root (CWD or parents).
+
+    The server never changes directory, so the lookup is done once per process.
+    """
     cwd = Path.cwd()
     for parent in [cwd, *cwd.parents]:
         candidate = parent / ".env"
@@ -45,12 +63,74 @@ def _find_env_file() -> Path:
     return cwd / ".env"
 
 
+def _iter_env_keys(text: str) -> Iterator[tuple[str, int, int]]:
+    """Yield (key, start, end) for every KEY=value line in .env text.
+
+    Walks the text once by offset; start/end bound the line without its
+    newline, so callers can splice replacements straight into `text`.
+    """
+    pos, size = 0, len(text)
+    while pos < size:
+        end = text.find("\n", pos)
+        if end < 0:
+            end = size
+        # Skip indentation by index rather than allocating a stripped copy
+        i = pos
+        while i < end and text[i] in " \t":
+            i += 1
+        if i < end and text[i] != "#":
+            eq = text.find("=", i, end)
+            if eq > i:
+                yield text[i:eq].rstrip(), pos, end
+        pos = end + 1
+
+
+def _splice_env(
+    text: str, edits: list[tuple[int, int, str]], extra: list[str]
+) -> list[str]:
+    """Replace each (start, end) line span in `text` and append `extra` lines.
+
+    Returns the new content as pieces for _write_env rather than one string.
+    """
+    pieces: list[str] = []
+    prev = 0
+    for start, end, line in sorted(edits):
+        pieces += (text[prev:start], line)
+        prev = end
+    pieces.append(text[prev:])
+    if extra:
+        if text and not text.endswith("\n"):
+            pieces.append("\n")
+        for line in extra:
+            pieces += (line, "\n")
+    return pieces
+
+
+def _write_env(env_path: Path, pieces: list[str]) -> None:
+    """Atomically replace `env_path` with `pieces`, keeping its permissions.
+
+    The content goes to a temp file in the same directory which is then
+    renamed over the original, so a crash mid-write never leaves a torn .env.
+    """
+    fd, tmp = tempfile.mkstemp(dir=env_path.parent, prefix=".env.", suffix=".tmp")
+    try:
+        with open(fd, "w", buffering=65536) as f:
+            f.writelines(pieces)
+        if env_path.exists():
+            os.chmod(tmp, env_path.stat().st_mode)
+        os.replace(tmp, env_path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
 class SettingsState(State):
     config_items: list[list[str]] = []
     connection_result: str = ""
     connection_success: bool = False
     is_testing_connection: bool = False
     test_agent_message: str = ""
+    has_test_message: bool = False
     test_agent_response: str = ""
     is_testing_agent: bool = False
     guide_open: bool = False
@@ -72,34 +152,49 @@ class SettingsState(State):
     is_resolving_schema: bool = False
     manual_schema_name: str = ""
 
+    # Fingerprint of the env vars config_items was last built from
+    _last_env_fp: int = 0
+
     def set_test_agent_message(self, value: str) -> None:
         self.test_agent_message = value
+        self.has_test_message = bool(value) and not value.isspace()
 
     def set_manual_schema_name(self, value: str) -> None:
         self.manual_schema_name = value
 
+    def _reset_schema_lookup(self) -> None:
+        """Forget a schema name resolved or typed for the previous env values."""
+        self.resolved_schema_name = ""
+        self.schema_resolve_error = ""
+        self.manual_schema_name = ""
+
     def load_config(self) -> None:
-        from dotenv import load_dotenv
         load_dotenv(override=True)
-        items = []
-        for var_name, label in ENV_VARS:
-            value = os.getenv(var_name, "")
-            if var_name in SECRET_VARS and value:
-                display = value[:4] + "..." + value[-4:] if len(value) > 8 else "****"
-            elif not value:
-                display = "(not set)"
-            else:
-                display = value
-            items.append([label, display, "set" if value else "missing"])
-        self.config_items = items
+        self._reset_schema_lookup()
 
-        agent_id = os.getenv("COPILOT_AGENT_IDENTIFIER", "")
-        schema_set = bool(os.getenv("COPILOT_AGENT_SCHEMA", "").strip())
+        # Everything below is derived from the env vars; skip it if none changed
+        values = [_ENV.get(var_name, "") for var_name in VAR_NAMES]
+        fp = hash(tuple(values))
+        if fp == self._last_env_fp and self.config_items:
+            return
+        self._show_env_values(values, fp)
+
+    def _show_env_values(self, values: list[str], fp: int) -> None:
+        """Rebuild everything derived from the ENV_VARS values (in VAR_NAMES order)."""
+        self._last_env_fp = fp
+        self.config_items = [
+            [
+                label,
+                _mask(value) if value and var_name in SECRET_VARS else (value or "(not set)"),
+                "set" if value else "missing",
+            ]
+            for (var_name, label), value in zip(ENV_VARS, values)
+        ]
+
+        agent_id = values[NAME_TO_POS["COPILOT_AGENT_IDENTIFIER"]]
+        schema_set = bool(values[NAME_TO_POS["COPILOT_AGENT_SCHEMA"]].strip())
         self.agent_id_is_guid = bool(_UUID_RE.match(agent_id)) and not schema_set
-        self.resolved_schema_name = ""
-        self.schema_resolve_error = ""
-        self.manual_schema_name = ""
-        self.client_id_display = os.getenv("AZURE_AD_CLIENT_ID", "(not set)")
+        self.client_id_display = values[NAME_TO_POS["AZURE_AD_CLIENT_ID"]] or "(not set)"
 
         try:
             from d2e_client import _get_settings
@@ -112,54 +207,52 @@ class SettingsState(State):
     def toggle_edit_mode(self) -> None:
         if not self.edit_mode:
             # Pre-populate edit fields with current raw values
-            values = []
-            for var_name, _ in ENV_VARS:
-                values.append(os.getenv(var_name, ""))
-            self.edit_values = values
+            getenv = _ENV.get
+            self.edit_values = [getenv(var_name, "") for var_name in VAR_NAMES]
             self.save_result = ""
         self.edit_mode = not self.edit_mode
 
     def set_edit_value(self, index: int, value: str) -> None:
-        new_values = list(self.edit_values)
-        new_values[index] = value
-        self.edit_values = new_values
+        # Reflex tracks item assignment on list vars, so no copy is needed
+        self.edit_values[index] = value
 
     def save_settings(self) -> None:
         """Write the edited values to the .env file and reload env."""
         env_path = _find_env_file()
         try:
             # Read existing .env content (to preserve comments and unrelated vars)
-            existing_lines: list[str] = []
-            if env_path.exists():
-                existing_lines = env_path.read_text().splitlines()
-
-            # Build a map of var -> line index for existing lines
-            existing_map: dict[str, int] = {}
-            for idx, line in enumerate(existing_lines):
-                stripped = line.strip()
-                if stripped and not stripped.startswith("#") and "=" in stripped:
-                    key = stripped.split("=", 1)[0].strip()
-                    existing_map[key] = idx
+            text = env_path.read_text() if env_path.exists() else ""
+
+            # Line span of each ENV_VARS entry, by position; the last occurrence wins
+            spans: list[tuple[int, int] | None] = [None] * len(ENV_VARS)
+            for key, start, end in _iter_env_keys(text):
+                pos = NAME_TO_POS.get(key)
+                if pos is not None:
+                    spans[pos] = (start, end)
 
             # Apply edits
-            for i, (var_name, _) in enumerate(ENV_VARS):
-                new_val = self.edit_values[i]
+            edits: list[tuple[int, int, str]] = []
+            extra: list[str] = []
+            for var_name, new_val, span in zip(VAR_NAMES, self.edit_values, spans):
                 new_line = f"{var_name}={new_val}"
-                if var_name in existing_map:
-                    existing_lines[existing_map[var_name]] = new_line
+                if span is not None:
+                    edits.append((*span, new_line))
                 else:
-                    existing_lines.append(new_line)
+                    extra.append(new_line)
 
-            env_path.write_text("\n".join(existing_lines) + "\n")
+            _write_env(env_path, _splice_env(text, edits, extra))
 
-            # Reload into current process
-            from dotenv import load_dotenv
-            load_dotenv(str(env_path), override=True)
+            # Apply to the current process directly; we just wrote these values,
+            # so there is nothing to gain from re-reading the file
+            _ENV.update(zip(VAR_NAMES, self.edit_values))
 
             self.save_success = True
             self.save_result = f"Saved to {env_path}"
             self.edit_mode = False
-            self.load_config()
+            self._reset_schema_lookup()
+            # The saved values are the new env; no need to read them back
+            values = list(self.edit_values)
+            self._show_env_values(values, hash(tuple(values)))
 
         except Exception as e:
             self.save_success = False
@@ -167,7 +260,6 @@ class SettingsState(State):
 
     def resolve_schema_name(self) -> None:
         """Look up the agent schema name from Dataverse using the GUID in COPILOT_AGENT_IDENTIFIER."""
-        from dotenv import load_dotenv
         load_dotenv(override=True)
 
         client_secret = os.getenv("AZURE_AD_CLIENT_SECRET", "")
@@ -229,34 +321,26 @@ class SettingsState(State):
             return
         env_path = _find_env_file()
         try:
-            existing_lines: list[str] = []
-            if env_path.exists():
-                existing_lines = env_path.read_text().splitlines()
+            text = env_path.read_text() if env_path.exists() else ""
 
-            existing_map: dict[str, int] = {}
-            for idx, line in enumerate(existing_lines):
-                stripped = line.strip()
-                if stripped and not stripped.startswith("#") and "=" in stripped:
-                    key = stripped.split("=", 1)[0].strip()
-                    existing_map[key] = idx
+            span = None
+            for key, start, end in _iter_env_keys(text):
+                if key == "COPILOT_AGENT_SCHEMA":
+                    span = (start, end)
 
             new_line = f"COPILOT_AGENT_SCHEMA={schema_name}"
-            if "COPILOT_AGENT_SCHEMA" in existing_map:
-                existing_lines[existing_map["COPILOT_AGENT_SCHEMA"]] = new_line
+            if span:
+                _write_env(env_path, _splice_env(text, [(*span, new_line)], []))
             else:
-                existing_lines.append(new_line)
-
-            env_path.write_text("\n".join(existing_lines) + "\n")
+                _write_env(env_path, _splice_env(text, [], [new_line]))
 
-            from dotenv import load_dotenv
-            load_dotenv(str(env_path), override=True)
+            _ENV["COPILOT_AGENT_SCHEMA"] = schema_name
 
             self.load_config()
         except Exception as e:
             self.schema_resolve_error = f"Error saving: {e}"
 
     def test_connection(self) -> None:
-        from dotenv import load_dotenv
         load_dotenv(override=True)
 
         self.is_testing_connection = True
@@ -274,10 +358,9 @@ class SettingsState(State):
             self.is_testing_connection = False
 
     def send_test_message(self) -> None:
-        if not self.test_agent_message.strip():
+        if not self.has_test_message:
             return
 
-        from dotenv import load_dotenv
         load_dotenv(override=True)
 
         self.is_testing_agent = True
@@ -362,6 +445,13 @@ def _edit_field(index: int, var_name: str, label: str) -> rx.Component:
     )
 
 
+# ENV_VARS is static and each field reads its value from state, so the edit
+# form is built once at import
+_EDIT_FIELDS = tuple(
+    _edit_field(i, var_name, label) for i, (var_name, label) in enumerate(ENV_VARS)
+)
+
+
 def _guid_warning_banner() -> rx.Component:
     return rx.vstack(
         rx.callout(
@@ -530,10 +620,7 @@ def config_section() -> rx.Component:
                         color="var(--gray-a8)",
                     ),
                     rx.separator(),
-                    *[
-                        _edit_field(i, var_name, label)
-                        for i, (var_name, label) in enumerate(ENV_VARS)
-                    ],
+                    *_EDIT_FIELDS,
                     spacing="3",
                     width="100%",
                 ),
@@ -667,7 +754,7 @@ def test_agent_section() -> rx.Component:
                         ),
                     ),
                     on_click=SettingsState.send_test_message,
-                    disabled=SettingsState.is_testing_agent,
+                    disabled=SettingsState.is_testing_agent | ~SettingsState.has_test_message,
                     size="2",
                 ),
                 width="100%",
@@ -729,6 +816,61 @@ def test_agent_section() -> rx.Component:
     )
 
 
+def _guide_step(number: str, title: str, description: str) -> rx.Component:
+    return rx.hstack(
+        rx.badge(
+            number, variant="solid", size="2", color_scheme="teal"
+        ),
+        rx.vstack(
+            rx.text(title, weight="bold", size="2"),
+            rx.text(description, size="2", color="var(--gray-a8)"),
+            spacing="1",
+        ),
+        spacing="3",
+        align="start",
+        width="100%",
+    )
+
+
+# The guide text is static, so its body is built once at import
+_GUIDE_BODY = rx.vstack(
+    rx.separator(),
+    _guide_step(
+        "1",
+        "Create App Registration",
+        "Azure Portal > AAD > App Registrations > New. "
+        "Name: 'Copilot Studio Eval'. Single tenant.",
+    ),
+    _guide_step(
+        "2",
+        "Note the IDs",
+        "Copy the Application (client) ID → AZURE_AD_CLIENT_ID. "
+        "Copy the Directory (tenant) ID → AZURE_AD_TENANT_ID.",
+    ),
+    _guide_step(
+        "3",
+        "Create Client Secret",
+        "Go to Certificates & secrets > New client secret. "
+        "Copy the Value → AZURE_AD_CLIENT_SECRET.",
+    ),
+    _guide_step(
+        "4",
+        "Add API Permissions",
+        "Go to API permissions > Add a permission > APIs my organization uses > "
+        "Search 'Power Platform API' > Delegated permissions > user_impersonation. "
+        "Grant admin consent.",
+    ),
+    _guide_step(
+        "5",
+        "Enable D2E on Agent",
+        "In Copilot Studio, open your agent > Settings > Security > "
+        "Enable Direct-to-Engine. Note the Environment ID and Agent Identifier.",
+    ),
+    spacing="3",
+    width="100%",
+)
+
+
 def app_registration_guide() -> rx.Component:
     return rx.card(
         rx.vstack(
@@ -760,45 +902,7 @@ def app_registration_guide() -> rx.Component:
                 width="100%",
                 align="center",
             ),
-            rx.cond(
-                SettingsState.guide_open,
-                rx.vstack(
-                    rx.separator(),
-                    _guide_step(
-                        "1",
-                        "Create App Registration",
-                        "Azure Portal > AAD > App Registrations > New. "
-                        "Name: 'Copilot Studio Eval'. Single tenant.",
-                    ),
-                    _guide_step(
-                        "2",
-                        "Note the IDs",
-                        "Copy the Application (client) ID → AZURE_AD_CLIENT_ID. "
-                        "Copy the Directory (tenant) ID → AZURE_AD_TENANT_ID.",
-                    ),
-                    _guide_step(
-                        "3",
-                        "Create Client Secret",
-                        "Go to Certificates & secrets > New client secret. "
-                        "Copy the Value → AZURE_AD_CLIENT_SECRET.",
-                    ),
-                    _guide_step(
-                        "4",
-                        "Add API Permissions",
-                        "Go to API permissions > Add a permission > APIs my organization uses > "
-                        "Search 'Power Platform API' > Delegated permissions > user_impersonation. "
-                        "Grant admin consent.",
-                    ),
-                    _guide_step(
-                        "5",
-                        "Enable D2E on Agent",
-                        "In Copilot Studio, open your agent > Settings > Security > "
-                        "Enable Direct-to-Engine. Note the Environment ID and Agent Identifier.",
-                    ),
-                    spacing="3",
-                    width="100%",
-                ),
-            ),
+            rx.cond(SettingsState.guide_open, _GUIDE_BODY),
             spacing="3",
             width="100%",
         ),
@@ -806,22 +910,6 @@ def app_registration_guide() -> rx.Component:
     )
 
 
-def _guide_step(number: str, title: str, description: str) -> rx.Component:
-    return rx.hstack(
-        rx.badge(
-            number, variant="solid", size="2", color_scheme="teal"
-        ),
-        rx.vstack(
-            rx.text(title, weight="bold", size="2"),
-            rx.text(description, size="2", color="var(--gray-a8)"),
-            spacing="1",
-        ),
-        spacing="3",
-        align="start",
-        width="100%",
-    )
-
-
 @rx.page(route="/settings", title="Settings", on_load=SettingsState.load_config)
 def settings_page() -> rx.Component:
     return layout(
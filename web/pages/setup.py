@@ -1,12 +1,30 @@
 """Setup page — fill environment variables from Copilot Studio agent URL."""
 
+import asyncio
 import os
+import webbrowser
 
 import reflex as rx
 
+from provisioner import (
+    acquire_graph_token_silent,
+    add_secret_to_existing_app,
+    complete_device_flow,
+    forget_msal_app,
+    get_msal_app,
+    initiate_device_flow,
+    lookup_agent_schema_name,
+    lookup_dataverse_org_url,
+    parse_copilot_url,
+    update_env_file,
+)
 from web.components import layout, page_header
 from web.state import State
 
+# How many of the most recent provisioning log lines the page shows, and so
+# the most the server keeps
+_LOG_TAIL_LINES = 200
+
 
 class SetupState(State):
     current_step: int = 1
@@ -14,6 +32,7 @@ class SetupState(State):
     # Step 1
     agent_url: str = ""
     url_error: str = ""
+    has_url_error: bool = False
 
     # Parsed from URL
     environment_id: str = ""
@@ -26,15 +45,25 @@ class SetupState(State):
     # Step 3 — provisioning
     is_provisioning: bool = False
     provisioning_error: str = ""
+    has_provisioning_error: bool = False
     device_code: str = ""
+    has_device_code: bool = False
     device_code_url: str = ""
-    log_lines: list[str] = []
+    # Log stays on the server, capped at _LOG_TAIL_LINES; the page only gets log_tail
+    _log_lines: list[str] = []
+    # Environment this session last signed in for; a cached sign-in is only
+    # reused for the same environment, so another tenant always gets a fresh one
+    _signed_in_env: str = ""
 
     # Step 4 — result
     written_tenant_id: str = ""
     written_org_url: str = ""
     written_agent_id: str = ""
 
+    @rx.var
+    def log_tail(self) -> str:
+        return "\n".join(self._log_lines)
+
     def set_agent_url(self, value: str) -> None:
         self.agent_url = value
 
@@ -46,9 +75,8 @@ class SetupState(State):
 
     def parse_url(self) -> None:
         self.url_error = ""
+        self.has_url_error = False
         try:
-            from provisioner import parse_copilot_url
-
             parsed = parse_copilot_url(self.agent_url)
             self.environment_id = parsed.environment_id
             self.bot_id = parsed.bot_id
@@ -58,79 +86,113 @@ class SetupState(State):
             self.current_step = 2
         except ValueError as e:
             self.url_error = str(e)
+            self.has_url_error = True
 
     def go_back(self) -> None:
         if self.current_step > 1:
             self.current_step -= 1
 
+    def sign_in_again(self) -> None:
+        """Drop the reused sign-in and provision with a new device code login."""
+        self._signed_in_env = ""
+        return SetupState.provision
+
     @rx.event(background=True)
     async def provision(self) -> None:
         async with self:
             self.current_step = 3
             self.is_provisioning = True
             self.provisioning_error = ""
+            self.has_provisioning_error = False
             self.device_code = ""
+            self.has_device_code = False
             self.device_code_url = ""
-            self.log_lines = []
+            self._log_lines = []
             env_id = self.environment_id
             bot_id = self.bot_id
             app_client_id = self.client_id.strip()
             agent_id = self.agent_identifier.strip()
-
-        async def _log(msg: str) -> None:
-            async with self:
-                self.log_lines = [*self.log_lines, msg]
+            reuse_sign_in = self._signed_in_env == env_id
+            session_key = self.router.session.client_token
+
+        # Log lines are buffered and pushed to the UI in one state update just
+        # before each slow step, instead of one update per line. Any other field
+        # changes due at that point ride along in the same update.
+        pending: list[str] = []
+
+        def _log(msg: str) -> None:
+            pending.append(msg)
+
+        async def _flush_logs(**changes: object) -> None:
+            if pending or changes:
+                async with self:
+                    # Reflex tracks in-place list mutation, so no copy is needed
+                    self._log_lines.extend(pending)
+                    del self._log_lines[:-_LOG_TAIL_LINES]
+                    for name, value in changes.items():
+                        setattr(self, name, value)
+                pending.clear()
 
         try:
-            import webbrowser
-
-            from provisioner import (
-                add_secret_to_existing_app,
-                complete_device_flow,
-                initiate_device_flow,
-                lookup_agent_schema_name,
-                lookup_dataverse_org_url,
-                update_env_file,
-            )
-
             if not app_client_id:
                 raise ValueError("Client ID is required")
 
-            # Step 1: device flow for Graph (uses Azure CLI public client — no secret needed)
-            await _log("Initiating device code flow for Microsoft Graph...")
-            msal_app, flow = initiate_device_flow()
-
-            async with self:
-                self.device_code = flow["user_code"]
-                self.device_code_url = flow["verification_uri"]
-
-            await _log(f"Sign in at {flow['verification_uri']} with code: {flow['user_code']}")
-            webbrowser.open(flow["verification_uri"])
-
-            await _log("Waiting for sign-in...")
-            graph_token, tenant_id = complete_device_flow(msal_app, flow)
-            await _log(f"Authenticated — tenant: {tenant_id}")
-
-            async with self:
-                self.device_code = ""
-
-            # Step 2: add a new client secret to the existing app registration
-            await _log(f"Adding client secret to app {app_client_id}...")
-            client_secret = add_secret_to_existing_app(graph_token, app_client_id)
-            await _log("Client secret created.")
-
-            # Step 3: BAP API → Dataverse org URL (uses cached BAP token, no second login)
-            await _log("Looking up Dataverse org URL...")
-            org_url = lookup_dataverse_org_url(msal_app, env_id)
-            await _log(f"Dataverse org URL: {org_url}")
+            # Step 1: Graph token (uses Azure CLI public client — no secret needed).
+            # Each browser session keeps its own MSAL app, so a retry for the same
+            # environment reuses this session's sign-in. Network calls run in worker
+            # threads so log flushes and the device code reach the UI while they block.
+            msal_app = get_msal_app(session_key)
+            cached = None
+            if reuse_sign_in:
+                cached = await asyncio.to_thread(acquire_graph_token_silent, msal_app)
+            if cached:
+                graph_token, tenant_id = cached
+                _log(f"Reusing existing sign-in — tenant: {tenant_id}")
+            else:
+                # Sign in on a fresh app so later lookups only see this account
+                forget_msal_app(session_key)
+                msal_app = get_msal_app(session_key)
+                _log("Initiating device code flow for Microsoft Graph...")
+                await _flush_logs()
+                _, flow = await asyncio.to_thread(initiate_device_flow, app=msal_app)
+
+                _log(f"Sign in at {flow['verification_uri']} with code: {flow['user_code']}")
+                webbrowser.open(flow["verification_uri"])
+
+                _log("Waiting for sign-in...")
+                await _flush_logs(
+                    device_code=flow["user_code"],
+                    has_device_code=True,
+                    device_code_url=flow["verification_uri"],
+                )
+                graph_token, tenant_id = await asyncio.to_thread(
+                    complete_device_flow, msal_app, flow
+                )
+                _log(f"Authenticated — tenant: {tenant_id}")
+
+            # Steps 2 + 3: add a new client secret to the existing app registration
+            # (Graph) and look up the Dataverse org URL (BAP, cached token, no second
+            # login). The two calls are independent, so they run side by side.
+            _log(f"Adding client secret to app {app_client_id}...")
+            _log("Looking up Dataverse org URL...")
+            await _flush_logs(device_code="", has_device_code=False, _signed_in_env=env_id)
+            client_secret, org_url = await asyncio.gather(
+                asyncio.to_thread(add_secret_to_existing_app, graph_token, app_client_id),
+                asyncio.to_thread(lookup_dataverse_org_url, msal_app, env_id),
+            )
+            _log("Client secret created.")
+            _log(f"Dataverse org URL: {org_url}")
 
             # Step 4: look up agent schema name if not provided
             if not agent_id:
-                await _log("Looking up agent schema name from Dataverse...")
-                agent_id = lookup_agent_schema_name(msal_app, env_id, bot_id)
-                await _log(f"Agent schema name: {agent_id}")
-
-            # Step 5: write all vars to .env and reload
+                _log("Looking up agent schema name from Dataverse...")
+                await _flush_logs()
+                agent_id = await asyncio.to_thread(
+                    lookup_agent_schema_name, msal_app, env_id, bot_id, org_url=org_url
+                )
+                _log(f"Agent schema name: {agent_id}")
+
+            # Step 5: write all vars to .env and apply them to this process
             updates = {
                 "AZURE_AD_TENANT_ID": tenant_id,
                 "AZURE_AD_CLIENT_ID": app_client_id,
@@ -140,25 +202,28 @@ class SetupState(State):
                 "DATAVERSE_ORG_URL": org_url,
             }
 
-            await _log("Writing .env file...")
-            update_env_file(".env", updates)
-
-            from dotenv import load_dotenv
-            load_dotenv(override=True)
-            await _log("Done.")
-
-            async with self:
-                self.written_tenant_id = tenant_id
-                self.written_org_url = org_url
-                self.written_agent_id = agent_id
-                self.is_provisioning = False
-                self.current_step = 4
+            _log("Writing .env file...")
+            await asyncio.to_thread(update_env_file, ".env", updates)
+            # The values are already in memory, so no need to re-read the file
+            os.environ.update(updates)
+            # Drop the plaintext secret from this frame; the environment now owns it
+            del client_secret, updates
+            _log("Done.")
+            await _flush_logs(
+                written_tenant_id=tenant_id,
+                written_org_url=org_url,
+                written_agent_id=agent_id,
+                is_provisioning=False,
+                current_step=4,
+            )
 
         except Exception as e:
-            await _log(f"ERROR: {e}")
-            async with self:
-                self.provisioning_error = str(e)
-                self.is_provisioning = False
+            _log(f"ERROR: {e}")
+            await _flush_logs(
+                provisioning_error=str(e),
+                has_provisioning_error=True,
+                is_provisioning=False,
+            )
 
 
 # ---------------------------------------------------------------------------
@@ -166,8 +231,10 @@ class SetupState(State):
 # ---------------------------------------------------------------------------
 
 
+_STEP_LABELS = ("Paste URL", "Confirm", "Provision", "Done")
+
+
 def _step_indicator() -> rx.Component:
-    steps = ["Paste URL", "Confirm", "Provision", "Done"]
     return rx.hstack(
         *[
             rx.hstack(
@@ -192,7 +259,7 @@ def _step_indicator() -> rx.Component:
                     "0.4",
                 ),
             )
-            for i, label in enumerate(steps)
+            for i, label in enumerate(_STEP_LABELS)
         ],
         spacing="2",
         padding_bottom="16px",
@@ -226,7 +293,7 @@ def _step_1_paste_url() -> rx.Component:
                 size="3",
             ),
             rx.cond(
-                SetupState.url_error != "",
+                SetupState.has_url_error,
                 rx.callout(
                     SetupState.url_error,
                     icon="triangle_alert",
@@ -336,7 +403,7 @@ def _step_3_provisioning() -> rx.Component:
                 letter_spacing="-0.01em",
             ),
             rx.cond(
-                SetupState.device_code != "",
+                SetupState.has_device_code,
                 rx.callout(
                     rx.vstack(
                         rx.text(
@@ -372,21 +439,21 @@ def _step_3_provisioning() -> rx.Component:
                     align="center",
                 ),
             ),
-            rx.box(
-                rx.foreach(
-                    SetupState.log_lines,
-                    lambda line: rx.text(line, size="1", as_="div"),
-                ),
+            rx.el.pre(
+                SetupState.log_tail,
                 width="100%",
                 max_height="300px",
                 overflow_y="auto",
                 padding="12px",
+                margin="0",
                 border_radius="var(--radius-2)",
                 background="var(--gray-a2)",
                 font_family="monospace",
+                font_size="var(--font-size-1)",
+                white_space="pre-wrap",
             ),
             rx.cond(
-                SetupState.provisioning_error != "",
+                SetupState.has_provisioning_error,
                 rx.vstack(
                     rx.callout(
                         SetupState.provisioning_error,
@@ -394,10 +461,19 @@ def _step_3_provisioning() -> rx.Component:
                         color_scheme="red",
                         width="100%",
                     ),
-                    rx.button(
-                        "Retry",
-                        on_click=SetupState.provision,
-                        size="3",
+                    rx.hstack(
+                        rx.button(
+                            "Retry",
+                            on_click=SetupState.provision,
+                            size="3",
+                        ),
+                        rx.button(
+                            "Sign in with a different account",
+                            variant="outline",
+                            on_click=SetupState.sign_in_again,
+                            size="3",
+                        ),
+                        spacing="3",
                     ),
                     spacing="3",
                     width="100%",
@@ -473,10 +549,13 @@ def setup_page() -> rx.Component:
                 "Configure environment variables from your Copilot Studio agent URL",
             ),
             _step_indicator(),
-            rx.cond(SetupState.current_step == 1, _step_1_paste_url()),
-            rx.cond(SetupState.current_step == 2, _step_2_confirm()),
-            rx.cond(SetupState.current_step == 3, _step_3_provisioning()),
-            rx.cond(SetupState.current_step == 4, _step_4_done()),
+            rx.match(
+                SetupState.current_step,
+                (2, _step_2_confirm()),
+                (3, _step_3_provisioning()),
+                (4, _step_4_done()),
+                _step_1_paste_url(),
+            ),
             spacing="5",
             width="100%",
             max_width="900px",
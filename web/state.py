@@ -1,17 +1,25 @@
 """Root state for the eval platform."""
 
+import logging
 import os
+import sys
 
 import reflex as rx
 from loguru import logger
 
+# enqueue=True hands formatting and the console write to loguru's worker
+# thread, so bursts of log lines never block the event loop
 logger.remove()
 logger.add(
-    sink=lambda msg: print(msg, end=""),
+    sink=sys.stderr,
     level=os.getenv("LOG_LEVEL", "INFO"),
     format="{time:DD-MM-YYYY at HH:mm:ss} | {level: <8} | {message}",
+    enqueue=True,
 )
 
+# MSAL logs every token and device-flow request at INFO/DEBUG
+logging.getLogger("msal").setLevel(logging.WARNING)
+
 
 class State(rx.State):
     """Root application state."""